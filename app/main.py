@@ -24,7 +24,7 @@ from app.services.backup import run_router_check
 from app.services.config import settings
 from app.services.mikrotik import MikroTikClient, check_port
 from app.services.scheduler import scheduler, start_scheduler
-from app.services.telegram import send_message
+from app.services.telegram import invalidate_telegram_settings, send_message
 
 try:
     import psutil  # type: ignore
@@ -306,6 +306,7 @@ async def restore_config_backup(
                         ),
                     )
 
+    invalidate_telegram_settings()
     return RedirectResponse("/settings?notice=config_restored#rv-settings-general", status_code=HTTP_303_SEE_OTHER)
 
 
@@ -725,8 +726,8 @@ def restore_backup(backup_id: int):
             username=router["username"],
             password=router["encrypted_password"],
             ftp_port=router["ftp_port"] or 21,
-        ) as client:
-            client.restore_backup(backup_path.name, backup_path.read_bytes())
+        ) as client, backup_path.open("rb") as fh:
+            client.restore_backup(backup_path.name, fh)
         try:
             from app.services.alerts import create_alert
 
@@ -1424,6 +1425,7 @@ def update_settings(
                 notify_restore,
             ),
     )
+    invalidate_telegram_settings()
     tab_anchor = "rv-settings-general"
     if section_key == "telegram":
         tab_anchor = "rv-settings-telegram"
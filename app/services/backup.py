@@ -1,13 +1,37 @@
 import json
+import logging
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime, timedelta
+from operator import itemgetter
 from pathlib import Path
 from typing import Dict, Tuple
 
 from app.db import get_db, utcnow
 from app.services.config import settings
-from app.services.mikrotik import MikroTikClient, normalize_export, sha256_text
+from app.services.mikrotik import MikroTikClient, hash_export
 from zoneinfo import ZoneInfo
 
+try:
+    import orjson
+except ImportError:  # pragma: no cover
+    orjson = None
+
+
+logger = logging.getLogger(__name__)
+
+_PH_TZ = ZoneInfo("Asia/Manila")
+
+# `MikroTikClient.fetch_logs` always fills these keys with strings.
+_log_row_fields = itemgetter("logged_at", "topics", "message")
+
+
+def _dumps(value) -> str:
+    if orjson is not None:
+        return orjson.dumps(value).decode("utf-8")
+    return json.dumps(value)
+
 
 def parse_recipients(raw: str) -> list[str]:
     return [rid.strip() for rid in raw.split(",") if rid.strip()]
@@ -17,8 +41,8 @@ def safe_name(value: str) -> str:
     return "".join(ch if ch.isalnum() or ch in ("-", "_") else "_" for ch in value).strip("_")
 
 
-def ensure_storage_dirs(router_name: str) -> tuple[Path, Path, Path]:
-    router_dir = settings.storage_path / safe_name(router_name)
+def ensure_storage_dirs(router_name: str, slug: str | None = None) -> tuple[Path, Path, Path]:
+    router_dir = settings.storage_path / (slug if slug is not None else safe_name(router_name))
     backups_dir = router_dir / "backups"
     rsc_dir = router_dir / "rsc"
     backups_dir.mkdir(parents=True, exist_ok=True)
@@ -27,54 +51,21 @@ def ensure_storage_dirs(router_name: str) -> tuple[Path, Path, Path]:
 
 
 def delete_old_local_files(folder: Path, retention_days: int, protected: set[str] | None = None) -> None:
-    cutoff = datetime.utcnow().timestamp() - retention_days * 86400
+    cutoff_ns = int((time.time() - retention_days * 86400) * 1_000_000_000)
     protected = protected or set()
-    for entry in folder.iterdir():
-        if not entry.is_file():
-            continue
-        if not entry.name.startswith("rv_"):
-            continue
-        if entry.name in protected:
-            continue
-        if entry.stat().st_mtime <= cutoff:
-            entry.unlink(missing_ok=True)
-
-
-def is_baseline_due(router: Dict, now: datetime) -> bool:
-    if not router.get("daily_baseline_time"):
-        return False
-    try:
-        baseline_time = datetime.strptime(router["daily_baseline_time"], "%H:%M").time()
-    except ValueError:
-        return False
-    last_baseline = router.get("last_baseline_at")
-    last_baseline_date = None
-    if last_baseline:
-        try:
-            last_dt = datetime.fromisoformat(last_baseline)
-            if last_dt.tzinfo is None:
-                last_dt = last_dt.replace(tzinfo=ZoneInfo("UTC"))
-            last_baseline_date = last_dt.astimezone(ZoneInfo("Asia/Manila")).date()
-        except ValueError:
-            last_baseline_date = None
-    now_ph = now
-    if now_ph.tzinfo is None:
-        now_ph = now_ph.replace(tzinfo=ZoneInfo("Asia/Manila"))
-    if last_baseline_date == now_ph.date():
-        return False
-    return now_ph.time() >= baseline_time
-
-
-def is_interval_due(router: Dict, now: datetime) -> bool:
-    last_check = router.get("last_check_at")
-    if not last_check:
-        return True
-    try:
-        last_dt = datetime.fromisoformat(last_check)
-    except ValueError:
-        return True
-    interval = timedelta(hours=router.get("backup_check_interval_hours") or 6)
-    return now - last_dt >= interval
+    with os.scandir(folder) as entries:
+        for entry in entries:
+            if not entry.name.startswith("rv_"):
+                continue
+            if entry.name in protected:
+                continue
+            if not entry.is_file(follow_symlinks=False):
+                continue
+            if entry.stat(follow_symlinks=False).st_mtime_ns <= cutoff_ns:
+                try:
+                    os.unlink(entry.path)
+                except FileNotFoundError:
+                    pass
 
 
 def should_force_backup(router: Dict, now: datetime) -> bool:
@@ -108,16 +99,17 @@ def run_router_check(
     trigger: str = "auto",
 ) -> None:
     base_timeout = int(router.get("api_timeout_seconds") or 5)
-    client = MikroTikClient(
+    with MikroTikClient(
         host=router["ip"],
         port=router["api_port"],
         timeout=base_timeout,
         username=router["username"],
         password=router["encrypted_password"],
         ftp_port=router.get("ftp_port") or 21,
-    )
-    try:
+    ) as client:
         now = datetime.utcnow()
+        now_iso = now.isoformat()
+        router_slug = safe_name(router["name"])
         prior_error = (router.get("last_error") or "").strip()
         detection_logs = client.fetch_logs(router.get("last_log_check_at"), only_config_changes=True)
         log_cursor = client.get_router_clock_iso()
@@ -126,41 +118,27 @@ def run_router_check(
             log_cursor = cursor_dt.replace(microsecond=0).isoformat(sep=" ")
         except ValueError:
             pass
-        normalized = ""
+        # The `.rsc` export file is the single source of truth: it is hashed for
+        # change detection and saved as-is when a backup is taken, so RouterOS only
+        # has to render the export once per check.
+        stamp = now.strftime("%Y%m%dT%H%M%SZ")
+        tmp_name = f"rv_hash_{router_slug}_{stamp}_{router['id']}"
         try:
-            export_text = client.export_config()
-            normalized = normalize_export(export_text)
+            rsc_bytes = client.create_rsc_file(tmp_name)
         except Exception:
-            normalized = ""
-        fallback_rsc_bytes: bytes | None = None
-        if not normalized:
-            # Some RouterOS/librouteros combinations return non-textual rows for `/export`
-            # which can lead to an empty normalized export. Fall back to generating a
-            # temporary `.rsc` export file and hashing its contents instead.
-            try:
-                tmp_router_slug = safe_name(router["name"])
-                tmp_stamp = now.strftime("%Y%m%dT%H%M%SZ")
-                tmp_name = f"rv_hash_{tmp_router_slug}_{tmp_stamp}_{router['id']}"
-                try:
-                    fallback_rsc_bytes = client.create_rsc_file(tmp_name)
-                except Exception:
-                    retry_timeout = max(base_timeout, 30)
-                    if retry_timeout != base_timeout:
-                        with MikroTikClient(
-                            host=router["ip"],
-                            port=router["api_port"],
-                            timeout=retry_timeout,
-                            username=router["username"],
-                            password=router["encrypted_password"],
-                            ftp_port=router.get("ftp_port") or 21,
-                        ) as retry_client:
-                            fallback_rsc_bytes = retry_client.create_rsc_file(tmp_name)
-                    else:
-                        raise
-                normalized = normalize_export(fallback_rsc_bytes.decode("utf-8", errors="replace"))
-            except Exception:
-                normalized = ""
-        new_hash = sha256_text(normalized)
+            retry_timeout = max(base_timeout, 30)
+            if retry_timeout == base_timeout:
+                raise
+            with MikroTikClient(
+                host=router["ip"],
+                port=router["api_port"],
+                timeout=retry_timeout,
+                username=router["username"],
+                password=router["encrypted_password"],
+                ftp_port=router.get("ftp_port") or 21,
+            ) as retry_client:
+                rsc_bytes = retry_client.create_rsc_file(tmp_name)
+        new_hash = hash_export(rsc_bytes)
 
         # If our hashing logic changes (or RouterOS export formatting shifts), the
         # stored `last_hash` can temporarily diverge even when the config is the
@@ -189,11 +167,11 @@ def run_router_check(
                             prev_rsc_name = Path(row[0]).name or None
 
                 if prev_rsc_name:
-                    _, _, rsc_dir = ensure_storage_dirs(router["name"])
+                    _, _, rsc_dir = ensure_storage_dirs(router["name"], router_slug)
                     prev_path = rsc_dir / prev_rsc_name
                     if prev_path.exists():
                         prev_text = prev_path.read_text("utf-8", errors="replace")
-                        prev_hash = sha256_text(normalize_export(prev_text))
+                        prev_hash = hash_export(prev_text)
                         if prev_hash == new_hash:
                             old_hash = new_hash
             except Exception:
@@ -235,18 +213,22 @@ def run_router_check(
         else:
             backup_log_cursor = log_cursor
 
-        stamp = now.strftime("%Y%m%dT%H%M%SZ")
-        router_slug = safe_name(router["name"])
-        base_name = f"rv_{router_slug}_{stamp}"
+        # Names are not unique and parallel checks share a stamp, so routers whose names
+        # slug alike would otherwise write the same files.
+        base_name = f"rv_{router_slug}_{router['id']}_{stamp}"
         backup_name = f"{base_name}.backup"
         rsc_name = f"{base_name}.rsc"
 
-        backup_bytes = client.create_backup(base_name)
-        rsc_bytes = fallback_rsc_bytes if fallback_rsc_bytes is not None else client.create_rsc_file(base_name)
-        router_dir, backups_dir, rsc_dir = ensure_storage_dirs(router["name"])
+        router_dir, backups_dir, rsc_dir = ensure_storage_dirs(router["name"], router_slug)
         backup_path = backups_dir / backup_name
         rsc_path = rsc_dir / rsc_name
-        backup_path.write_bytes(backup_bytes)
+        # Stream the binary backup straight to disk instead of buffering it in memory.
+        try:
+            with backup_path.open("wb") as fh:
+                client.save_backup(base_name, fh)
+        except Exception:
+            backup_path.unlink(missing_ok=True)
+            raise
         rsc_path.write_bytes(rsc_bytes)
 
         retention_days = router.get("retention_days") or 30
@@ -278,36 +260,35 @@ def run_router_check(
         rsc_link = f"{base_url}/rsc/{rsc_name}"
 
         with get_db(settings.db_path) as conn:
+            # Columns that only move on backup/change/baseline keep their stored value
+            # otherwise; let SQLite pick instead of echoing the router row back.
             conn.execute(
             """
             UPDATE routers
-            SET last_log_check_at = ?,
-                last_backup_log_at = ?,
-                last_hash = ?,
-                last_backup_at = ?,
-                last_success_at = ?,
-                last_error = ?,
-                last_config_change_at = ?,
-                last_backup_links = ?,
-                last_check_at = ?,
-                last_baseline_at = ?,
-                updated_at = ?
-            WHERE id = ?
+            SET last_log_check_at = :log_cursor,
+                last_backup_log_at = CASE WHEN :needs_backup THEN :backup_log_cursor ELSE last_backup_log_at END,
+                last_hash = :new_hash,
+                last_backup_at = CASE WHEN :needs_backup THEN :now ELSE last_backup_at END,
+                last_success_at = CASE WHEN :needs_backup THEN :now ELSE last_success_at END,
+                last_error = NULL,
+                last_config_change_at = CASE WHEN :changed THEN :now ELSE last_config_change_at END,
+                last_backup_links = CASE WHEN :needs_backup THEN :links ELSE last_backup_links END,
+                last_check_at = :now,
+                last_baseline_at = CASE WHEN :baseline_due THEN :now ELSE last_baseline_at END,
+                updated_at = :now
+            WHERE id = :router_id
             """,
-            (
-                log_cursor,
-                backup_log_cursor if needs_backup else router.get("last_backup_log_at"),
-                new_hash,
-                utcnow() if needs_backup else router.get("last_backup_at"),
-                utcnow() if needs_backup else router.get("last_success_at"),
-                None,
-                utcnow() if changed else router.get("last_config_change_at"),
-                json.dumps({"backup": backup_link, "rsc": rsc_link}) if needs_backup else router.get("last_backup_links"),
-                utcnow(),
-                utcnow() if baseline_due else router.get("last_baseline_at"),
-                utcnow(),
-                router["id"],
-            ),
+            {
+                "log_cursor": log_cursor,
+                "backup_log_cursor": backup_log_cursor,
+                "new_hash": new_hash,
+                "now": now_iso,
+                "links": _dumps({"backup": backup_link, "rsc": rsc_link}) if needs_backup else None,
+                "needs_backup": needs_backup,
+                "changed": changed,
+                "baseline_due": baseline_due,
+                "router_id": router["id"],
+            },
         )
             backup_id = None
             if needs_backup:
@@ -319,12 +300,12 @@ def run_router_check(
                 """,
                 (
                     router["id"],
-                    utcnow(),
+                    now_iso,
                     new_hash,
                     rsc_link,
                     backup_link,
                     summary,
-                    json.dumps(backup_logs),
+                    _dumps(backup_logs),
                     trigger,
                     1 if forced else 0,
                     1 if changed else 0,
@@ -332,22 +313,15 @@ def run_router_check(
             )
                 backup_id = cursor.lastrowid
             logs_to_store = backup_logs if needs_backup else detection_logs
-            for entry in logs_to_store:
-                conn.execute(
+            router_id = router["id"]
+            conn.executemany(
                 """
                 INSERT INTO router_logs
                 (router_id, logged_at, topics, message, backup_id, created_at)
                 VALUES (?, ?, ?, ?, ?, ?)
                 """,
-                    (
-                        router["id"],
-                        entry.get("logged_at") or "",
-                        entry.get("topics") or "",
-                        entry.get("message") or "",
-                        backup_id,
-                        utcnow(),
-                    ),
-                )
+                [(router_id, *_log_row_fields(entry), backup_id, now_iso) for entry in logs_to_store],
+            )
 
         # Generate alerts after DB updates; ignore notification errors.
         try:
@@ -381,58 +355,120 @@ def run_router_check(
                 )
             except Exception:
                 pass
-    finally:
+
+
+def _run_scheduled_check(router_dict: Dict, baseline_due: bool) -> None:
+    try:
+        run_router_check(router_dict, baseline_due, force=False)
+    except Exception as exc:
+        failed_at = utcnow()
+        with get_db(settings.db_path) as conn:
+            conn.execute(
+                """
+                UPDATE routers
+                SET last_error = ?, last_check_at = ?, updated_at = ?
+                WHERE id = ?
+                """,
+                (str(exc), failed_at, failed_at, router_dict["id"]),
+            )
         try:
-            client.close()
+            from app.services.alerts import create_alert
+
+            create_alert(
+                router_id=int(router_dict["id"]),
+                level="error",
+                kind="backup_failed",
+                title=f"Router check failed: {router_dict['name']}",
+                message=str(exc),
+                dedupe_seconds=900,
+            )
         except Exception:
             pass
 
 
+def select_due_routers(conn, now_utc: datetime, now_ph: datetime) -> list[tuple[Dict, bool]]:
+    """
+    Return `(router, baseline_due)` for every enabled router that needs a check.
+
+    A router is interval-due when it was never checked, its `last_check_at` cannot be
+    parsed, or `backup_check_interval_hours` (0/NULL meaning 6) have elapsed. It is
+    baseline-due once its valid `H:MM`/`HH:MM` `daily_baseline_time` has passed today and
+    `last_baseline_at` is not from today. Both are evaluated in SQL so routers that are
+    not due never leave SQLite. The baseline day is taken in the scheduler's local zone
+    by shifting the stored UTC timestamp by the current offset (Asia/Manila has no DST).
+    """
+    offset_minutes = int(now_ph.utcoffset().total_seconds() // 60) if now_ph.utcoffset() else 0
+    rows = conn.execute(
+        """
+        SELECT *
+        FROM (
+            SELECT
+                routers.*,
+                CASE
+                    WHEN time(
+                        CASE
+                            WHEN daily_baseline_time GLOB '[0-9]:[0-5][0-9]' THEN '0' || daily_baseline_time
+                            WHEN daily_baseline_time GLOB '[0-9][0-9]:[0-5][0-9]' THEN daily_baseline_time
+                        END
+                    ) <= :local_time
+                    AND date(last_baseline_at, :local_offset) IS NOT :local_date
+                    THEN 1 ELSE 0
+                END AS baseline_due,
+                CASE
+                    WHEN COALESCE(last_check_at, '') = '' THEN 1
+                    WHEN julianday(last_check_at) IS NULL THEN 1
+                    WHEN (julianday(:now_utc) - julianday(last_check_at)) * 24
+                        >= COALESCE(NULLIF(backup_check_interval_hours, 0), 6) THEN 1
+                    ELSE 0
+                END AS interval_due
+            FROM routers
+            WHERE enabled = 1
+        )
+        WHERE baseline_due = 1 OR interval_due = 1
+        ORDER BY id
+        """,
+        {
+            "now_utc": now_utc.isoformat(),
+            "local_time": now_ph.strftime("%H:%M:%S"),
+            "local_date": now_ph.date().isoformat(),
+            "local_offset": f"{offset_minutes:+d} minutes",
+        },
+    ).fetchall()
+    due: list[tuple[Dict, bool]] = []
+    for row in rows:
+        router_dict = dict(row)
+        baseline_due = bool(router_dict.pop("baseline_due"))
+        router_dict.pop("interval_due", None)
+        due.append((router_dict, baseline_due))
+    return due
+
+
 def run_scheduled_checks() -> None:
     now_utc = datetime.utcnow()
-    now_ph = datetime.now(ZoneInfo("Asia/Manila"))
+    now_ph = datetime.now(_PH_TZ)
     with get_db(settings.db_path) as conn:
-        routers = conn.execute(
-            """
-            SELECT *
-            FROM routers
-            WHERE enabled = 1
-            """
-        ).fetchall()
+        due = select_due_routers(conn, now_utc, now_ph)
         conn.execute(
             "UPDATE settings SET last_scheduler_run = ? WHERE id = 1",
-            (utcnow(),),
+            (now_utc.isoformat(),),
         )
-    for router in routers:
-        router_dict = dict(router)
-        baseline_due = is_baseline_due(router_dict, now_ph)
-        interval_due = is_interval_due(router_dict, now_utc)
-        if baseline_due or interval_due:
-            try:
-                run_router_check(router_dict, baseline_due, force=False)
-            except Exception as exc:
-                with get_db(settings.db_path) as conn:
-                    conn.execute(
-                        """
-                        UPDATE routers
-                        SET last_error = ?, last_check_at = ?, updated_at = ?
-                        WHERE id = ?
-                        """,
-                        (str(exc), utcnow(), utcnow(), router_dict["id"]),
+    if due:
+        # Checks are dominated by network waits (API, FTP), so overlap them. Each
+        # worker opens its own SQLite connections through get_db().
+        workers = max(1, min(settings.check_workers, len(due)))
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="router-check") as executor:
+            futures = {
+                executor.submit(_run_scheduled_check, router_dict, baseline_due): router_dict
+                for router_dict, baseline_due in due
+            }
+            # A failure escaping the per-router handler (e.g. "database is locked" while
+            # recording the error) would otherwise vanish with its future.
+            for future in as_completed(futures):
+                exc = future.exception()
+                if exc is not None:
+                    logger.error(
+                        "Scheduled check failed for router %s", futures[future].get("name"), exc_info=exc
                     )
-                try:
-                    from app.services.alerts import create_alert
-
-                    create_alert(
-                        router_id=int(router_dict["id"]),
-                        level="error",
-                        kind="backup_failed",
-                        title=f"Router check failed: {router_dict['name']}",
-                        message=str(exc),
-                        dedupe_seconds=900,
-                    )
-                except Exception:
-                    pass
     try:
         from app.services.alerts import cleanup_old_alerts
 
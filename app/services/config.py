@@ -11,6 +11,9 @@ class Settings:
         self.scheduler_interval_seconds = int(
             os.getenv("ROUTERVAULT_SCHEDULER_INTERVAL", "300")
         )
+        self.check_workers = int(os.getenv("ROUTERVAULT_CHECK_WORKERS", "8"))
+        # recv(0)/read(0) would end a transfer immediately and leave an empty file.
+        self.ftp_blocksize = max(8192, int(os.getenv("ROUTERVAULT_FTP_BLOCKSIZE", "65536")))
 
     def require_env(self, name: str) -> str:
         value = os.getenv(name, "")
@@ -1,13 +1,14 @@
+import functools
 import hashlib
 import io
 import socket
 import time
 import re
 from ftplib import FTP, error_perm
-from datetime import date, datetime, time as dtime
-from typing import Dict, List, Tuple
+from datetime import date, datetime, time as dtime, timedelta
+from typing import BinaryIO, Dict, Iterator, List, Tuple
 
-from app.services.app_settings import export_show_sensitive, is_mock_mode
+from app.services.app_settings import AppSettings, load_app_settings
 from app.services.config import settings
 
 try:
@@ -16,6 +17,84 @@ except ImportError:  # pragma: no cover
     connect = None
 
 
+# Common noisy session/device state log phrases.
+_NOISE_PHRASES = (
+    "logged in",
+    "logged out",
+    "login failure",
+    "disconnect",
+    "disconnected",
+    "connecting",
+    "connected",
+    "terminating",
+    "terminated",
+    "initializing",
+    "initialized",
+    "session closed",
+    "link down",
+    "link up",
+)
+# One case-insensitive pass over the message instead of a substring scan per phrase.
+_NOISE_RE = re.compile("|".join(re.escape(phrase) for phrase in _NOISE_PHRASES), re.IGNORECASE)
+
+_CONFIG_CHANGE_RE = re.compile(
+    r"\b(config(?:uration)?\s+changed|changed|added|removed|created|deleted|modified|set|enabled|disabled|imported|exported)\b.*\bby\b",
+    re.IGNORECASE,
+)
+
+
+@functools.lru_cache(maxsize=4096)
+def _is_config_change_message(message: str) -> bool:
+    # RouterOS repeats the same messages (scheduler/script runs, rule edits) all day,
+    # so most lookups are cache hits and skip the regex.
+    return bool(_CONFIG_CHANGE_RE.search(message))
+
+
+_MONTHS = {
+    name: index
+    for index, name in enumerate(
+        ("jan", "feb", "mar", "apr", "may", "jun", "jul", "aug", "sep", "oct", "nov", "dec"), start=1
+    )
+}
+
+
+def _fast_parse_date(value: str) -> date | None:
+    # RouterOS' classic `jan/22/2026` shape, sliced directly instead of via strptime.
+    if len(value) != 11 or value[3] != "/" or value[6] != "/":
+        return None
+    month = _MONTHS.get(value[:3].lower())
+    if month is None:
+        return None
+    try:
+        return date(int(value[7:11]), month, int(value[4:6]))
+    except ValueError:
+        return None
+
+
+def _fast_parse_time(value: str) -> dtime | None:
+    # `19:08:09`
+    if len(value) != 8 or value[2] != ":" or value[5] != ":":
+        return None
+    try:
+        return dtime(int(value[0:2]), int(value[3:5]), int(value[6:8]))
+    except ValueError:
+        return None
+
+
+def _pick_date_fmt(value: str) -> str | None:
+    # Choose the one strptime format matching the date's shape instead of trying each
+    # in turn and paying for a ValueError per miss.
+    if len(value) > 4 and value[4] in "/-" and value[:4].isdigit():
+        return "%Y-%m-%d" if value[4] == "-" else "%Y/%m/%d"
+    if len(value) > 3 and value[3] == "/" and value[:3].isalpha():
+        year = value.rsplit("/", 1)[1] if value.count("/") == 2 else ""
+        if len(year) == 4:
+            return "%b/%d/%Y"
+        if len(year) == 2:
+            return "%b/%d/%y"
+    return None
+
+
 class MikroTikClient:
     def __init__(self, host: str, port: int, username: str, password: str, timeout: int = 5, ftp_port: int = 21):
         self.host = host
@@ -25,6 +104,19 @@ class MikroTikClient:
         self.timeout = timeout
         self.ftp_port = ftp_port
         self._api = None
+        self._ftp: FTP | None = None
+        self._app_settings: AppSettings | None = None
+        self._clock_cache: tuple[float, datetime | None] | None = None
+        # `.id`s of files located while waiting for them, so removal needn't re-list.
+        self._file_ids: dict[str, str] = {}
+
+    def _settings(self) -> AppSettings:
+        # A client lives for a single check/request; read the settings row once.
+        app_settings = self._app_settings
+        if app_settings is None:
+            app_settings = load_app_settings()
+            self._app_settings = app_settings
+        return app_settings
 
     def _connect(self):
         if connect is None:
@@ -53,7 +145,38 @@ class MikroTikClient:
         self._api = api
         return api
 
+    def _get_ftp(self) -> FTP:
+        ftp = self._ftp
+        if ftp is not None:
+            # RouterOS drops idle FTP sessions; probe before reusing one.
+            try:
+                ftp.voidcmd("NOOP")
+                return ftp
+            except Exception:
+                self._close_ftp()
+        ftp = FTP()
+        try:
+            ftp.connect(self.host, self.ftp_port, timeout=10)
+            ftp.login(self.username, self.password)
+        except Exception:
+            ftp.close()
+            raise
+        self._ftp = ftp
+        return ftp
+
+    def _close_ftp(self) -> None:
+        ftp = self._ftp
+        self._ftp = None
+        if ftp is None:
+            return
+        try:
+            ftp.quit()
+        except Exception:
+            ftp.close()
+
     def close(self) -> None:
+        self._clock_cache = None
+        self._close_ftp()
         api = self._api
         self._api = None
         if api is None:
@@ -83,7 +206,7 @@ class MikroTikClient:
         return False
 
     def test_connection(self) -> Tuple[bool, str]:
-        if is_mock_mode():
+        if self._settings().mock_mode:
             return True, ""
         try:
             api = self._get_api()
@@ -95,12 +218,25 @@ class MikroTikClient:
     def get_router_clock_iso(self) -> str:
         dt = self._get_router_clock()
         if dt is None:
-            return datetime.utcnow().replace(microsecond=0).isoformat(sep=" ")
-        return dt.replace(microsecond=0).isoformat(sep=" ")
+            return datetime.utcnow().replace(microsecond=0).isoformat()
+        return dt.replace(microsecond=0).isoformat()
 
     def _get_router_clock(self) -> datetime | None:
-        if is_mock_mode():
+        if self._settings().mock_mode:
             return datetime.utcnow()
+        # One check asks for the clock several times within seconds; reuse the last
+        # reading, advanced by the elapsed monotonic time, instead of another RPC.
+        cached = self._clock_cache
+        if cached is not None:
+            fetched_at, value = cached
+            elapsed = time.monotonic() - fetched_at
+            if elapsed < 5.0:
+                return value + timedelta(seconds=elapsed) if value is not None else None
+        value = self._read_router_clock()
+        self._clock_cache = (time.monotonic(), value)
+        return value
+
+    def _read_router_clock(self) -> datetime | None:
         try:
             api = self._get_api()
             row = list(api("/system/clock/print"))[0]
@@ -108,19 +244,23 @@ class MikroTikClient:
             time_raw = (row.get("time") or "").strip()
             if not date_raw or not time_raw:
                 return None
-            parsed_date: date | None = None
-            for fmt in ("%b/%d/%Y", "%Y-%m-%d", "%Y/%m/%d"):
+            parsed_date = _fast_parse_date(date_raw)
+            parsed_time = _fast_parse_time(time_raw)
+            if parsed_date is not None and parsed_time is not None:
+                return datetime.combine(parsed_date, parsed_time)
+            if parsed_date is None:
+                fmt = _pick_date_fmt(date_raw)
+                if fmt is None:
+                    return None
                 try:
                     parsed_date = datetime.strptime(date_raw, fmt).date()
-                    break
                 except ValueError:
-                    continue
-            if parsed_date is None:
-                return None
-            try:
-                parsed_time: dtime = datetime.strptime(time_raw, "%H:%M:%S").time()
-            except ValueError:
-                return None
+                    return None
+            if parsed_time is None:
+                try:
+                    parsed_time = datetime.strptime(time_raw, "%H:%M:%S").time()
+                except ValueError:
+                    return None
             return datetime.combine(parsed_date, parsed_time)
         except Exception:
             return None
@@ -128,28 +268,42 @@ class MikroTikClient:
     def _parse_log_datetime(self, entry: Dict[str, str], router_now: datetime | None) -> datetime | None:
         date_raw = (entry.get("date") or "").strip()
         time_raw = (entry.get("time") or "").strip()
+        parsed_time = _fast_parse_time(time_raw)
         if date_raw and time_raw:
-            for d_fmt in ("%b/%d/%Y", "%Y-%m-%d", "%Y/%m/%d", "%b/%d/%y"):
+            parsed_date = _fast_parse_date(date_raw)
+            if parsed_date is not None and parsed_time is not None:
+                return datetime.combine(parsed_date, parsed_time)
+            d_fmt = _pick_date_fmt(date_raw)
+            if d_fmt is not None:
                 try:
                     parsed_date = datetime.strptime(date_raw, d_fmt).date()
-                    parsed_time = datetime.strptime(time_raw, "%H:%M:%S").time()
-                    return datetime.combine(parsed_date, parsed_time)
+                    return datetime.combine(parsed_date, datetime.strptime(time_raw, "%H:%M:%S").time())
                 except ValueError:
-                    continue
+                    pass
 
-        # Some RouterOS variants include date inside `time`, e.g. "jan/22 19:08:09".
-        if time_raw and " " in time_raw and "/" in time_raw:
-            for fmt in ("%b/%d %H:%M:%S", "%b/%d/%Y %H:%M:%S", "%Y-%m-%d %H:%M:%S"):
+        # Some RouterOS variants include date inside `time`, e.g. "jan/22 19:08:09"
+        # or (RouterOS 7.10+) "2026-01-22 19:08:09".
+        if time_raw and " " in time_raw:
+            if "/" in time_raw:
+                with_year = time_raw.count("/", 0, time_raw.index(" ")) == 2
+                fmt = "%b/%d/%Y %H:%M:%S" if with_year else "%b/%d %H:%M:%S"
                 try:
                     dt = datetime.strptime(time_raw, fmt)
                     if dt.year == 1900 and router_now is not None:
                         dt = dt.replace(year=router_now.year)
                     return dt
                 except ValueError:
-                    continue
+                    pass
+            elif "-" in time_raw:
+                try:
+                    return datetime.fromisoformat(time_raw).replace(tzinfo=None)
+                except ValueError:
+                    pass
 
         # If the log line only contains a time-of-day, assume router "today".
         if time_raw and router_now is not None:
+            if parsed_time is not None:
+                return datetime.combine(router_now.date(), parsed_time)
             try:
                 parsed_time = datetime.strptime(time_raw, "%H:%M:%S").time()
                 return datetime.combine(router_now.date(), parsed_time)
@@ -158,10 +312,9 @@ class MikroTikClient:
         return None
 
     def fetch_logs(self, since: str | None, *, only_config_changes: bool = False) -> List[Dict[str, str]]:
-        if is_mock_mode():
+        if self._settings().mock_mode:
             return []
         api = self._get_api()
-        logs = list(api("/log/print"))
         filtered: List[Dict[str, str]] = []
 
         since_dt: datetime | None = None
@@ -170,115 +323,91 @@ class MikroTikClient:
                 since_dt = datetime.fromisoformat(since)
             except ValueError:
                 since_dt = None
+        # Read the clock first: the log rows below are consumed while they stream in,
+        # and the API session cannot run a second command until they are drained.
         router_now = self._get_router_clock()
 
-        noise_phrases = (
-            "logged in",
-            "logged out",
-            "login failure",
-            "disconnect",
-            "disconnected",
-            "connecting",
-            "connected",
-            "terminating",
-            "terminated",
-            "initializing",
-            "initialized",
-            "session closed",
-            "link down",
-            "link up",
-        )
-
-        config_change_re = re.compile(
-            r"\b(config(?:uration)?\s+changed|changed|added|removed|created|deleted|modified|set|enabled|disabled|imported|exported)\b.*\bby\b",
-            re.IGNORECASE,
-        )
-
-        for entry in logs:
+        # Only transfer the fields we parse; RouterOS log rows also carry ids/buffer names.
+        for entry in api("/log/print", **{".proplist": "date,time,topics,message"}):
             logged_dt = self._parse_log_datetime(entry, router_now)
             if since_dt is not None and logged_dt is not None and logged_dt < since_dt:
                 continue
 
-            logged_at = logged_dt.isoformat(sep=" ") if logged_dt is not None else (entry.get("time") or "")
             message = entry.get("message") or ""
-            topics = entry.get("topics") or ""
-            message_l = message.lower()
-            topics_l = topics.lower()
-
             # Exclude common noisy session/device state logs.
-            if any(phrase in message_l for phrase in noise_phrases):
+            if _NOISE_RE.search(message):
                 continue
 
+            topics = entry.get("topics") or ""
             if only_config_changes:
                 # Keep only logs likely to represent configuration changes.
                 # We treat scripts/scheduler as potentially-config-changing events.
+                topics_l = topics.lower()
                 if "script" in topics_l or "scheduler" in topics_l:
                     keep = True
                 else:
-                    keep = bool(config_change_re.search(message))
+                    keep = _is_config_change_message(message)
                 if not keep:
                     continue
 
+            logged_at = logged_dt.isoformat(sep=" ") if logged_dt is not None else (entry.get("time") or "")
             filtered.append({"logged_at": logged_at, "message": message, "topics": topics})
         return filtered
 
     def export_config(self) -> str:
-        if is_mock_mode():
+        if self._settings().mock_mode:
             seed = datetime.utcnow().isoformat()
             return f"# mock export {seed}\n/interface print\n"
         api = self._get_api()
         try:
-            try:
-                args = {"terse": "yes"}
-                if export_show_sensitive():
-                    args["show-sensitive"] = "yes"
-                export_lines = api("/export", **args)
-            except Exception:
-                export_lines = api("/export")
-
-            rendered: list[str] = []
-            for line in export_lines:
-                if isinstance(line, str):
-                    rendered.append(line)
-                    continue
-                if isinstance(line, (bytes, bytearray)):
-                    try:
-                        rendered.append(bytes(line).decode("utf-8", errors="replace"))
-                    except Exception:
-                        continue
-                    continue
-                if not isinstance(line, dict):
-                    continue
-                for key in ("text", "ret", "message", "data"):
-                    value = line.get(key)
-                    if isinstance(value, (bytes, bytearray)) and value:
-                        try:
-                            rendered.append(bytes(value).decode("utf-8", errors="replace"))
-                        except Exception:
-                            pass
-                        break
-                    if isinstance(value, str) and value:
-                        rendered.append(value)
-                        break
-            return "\n".join(rendered)
+            return "\n".join(self._iter_export_lines(api))
         except Exception as exc:
             raise RuntimeError(f"Failed to export config: {exc}")
 
-    def create_backup(self, name: str) -> bytes:
-        if is_mock_mode():
-            return f"backup::{name}".encode("utf-8")
+    def _iter_export_lines(self, api) -> Iterator[str]:
+        try:
+            args = {"terse": "yes"}
+            if self._settings().export_show_sensitive:
+                args["show-sensitive"] = "yes"
+            export_lines = api("/export", **args)
+        except Exception:
+            export_lines = api("/export")
+
+        for line in export_lines:
+            if isinstance(line, str):
+                yield line
+                continue
+            if isinstance(line, (bytes, bytearray)):
+                yield line.decode("utf-8", errors="replace")
+                continue
+            if not isinstance(line, dict):
+                continue
+            for key in ("text", "ret", "message", "data"):
+                value = line.get(key)
+                if isinstance(value, (bytes, bytearray)) and value:
+                    yield value.decode("utf-8", errors="replace")
+                    break
+                if isinstance(value, str) and value:
+                    yield value
+                    break
+
+    def save_backup(self, name: str, out: BinaryIO) -> None:
+        """Create a `.backup` on the router and stream it into `out`."""
+        if self._settings().mock_mode:
+            out.write(f"backup::{name}".encode("utf-8"))
+            return
         api = self._get_api()
         list(api("/system/backup/save", name=name))
         filename = self._wait_for_file(f"{name}.backup")
-        return self._download_file(filename)
+        self._download_into(filename, out)
 
     def create_rsc_file(self, name: str) -> bytes:
-        if is_mock_mode():
+        if self._settings().mock_mode:
             return self.export_config().encode("utf-8")
         api = self._get_api()
         try:
             args = {"file": name, "terse": "yes"}
-            if export_show_sensitive():
+            if self._settings().export_show_sensitive:
                 args["show-sensitive"] = "yes"
             list(api("/export", **args))
         except Exception:
@@ -289,19 +418,32 @@ class MikroTikClient:
     def _find_file_path(self, filename: str) -> str | None:
         try:
             api = self._get_api()
-            files = list(api("/file/print"))
+            # Files may live under a storage prefix (e.g. `flash/`), so match by suffix
+            # rather than asking RouterOS for an exact name.
+            files = list(api("/file/print", **{".proplist": ".id,name"}))
             for entry in files:
                 name = entry.get("name") or ""
                 if name == filename or name.endswith("/" + filename):
+                    file_id = entry.get(".id")
+                    if file_id:
+                        self._file_ids[name] = file_id
                     return name
         except Exception:
             return None
         return None
 
     def _remove_file_via_api(self, filename: str) -> None:
+        file_id = self._file_ids.pop(filename, None)
         try:
             api = self._get_api()
-            files = list(api("/file/print"))
+            # RouterOS accepts the file name as the item reference; only fall back to
+            # listing files for the `.id` when that is rejected.
+            try:
+                list(api("/file/remove", numbers=file_id or filename))
+                return
+            except Exception:
+                pass
+            files = list(api("/file/print", **{".proplist": ".id,name"}))
             for entry in files:
                 name = entry.get("name") or ""
                 if name == filename or name.endswith("/" + filename):
@@ -314,40 +456,52 @@ class MikroTikClient:
 
     def _wait_for_file(self, filename: str, timeout_seconds: float = 20.0) -> str:
         deadline = time.monotonic() + timeout_seconds
+        delay = 0.1
         while time.monotonic() < deadline:
             found = self._find_file_path(filename)
             if found:
                 return found
-            time.sleep(0.5)
+            time.sleep(delay)
+            delay = min(delay * 2, 1.0)
         return filename
 
     def _download_file(self, filename: str) -> bytes:
-        with FTP() as ftp:
-            ftp.connect(self.host, self.ftp_port, timeout=10)
-            ftp.login(self.username, self.password)
-            buffer = io.BytesIO()
-            for attempt in range(0, 6):
-                try:
-                    ftp.retrbinary(f"RETR {filename}", buffer.write)
-                    break
-                except error_perm as exc:
-                    if "550" in str(exc) and attempt < 5:
-                        time.sleep(0.5 + attempt * 0.5)
-                        continue
-                    raise
+        buffer = io.BytesIO()
+        self._download_into(filename, buffer)
+        return buffer.getvalue()
+
+    def _download_into(self, filename: str, out: BinaryIO) -> None:
+        ftp = self._get_ftp()
+        for attempt in range(0, 6):
             try:
-                ftp.delete(filename)
+                ftp.retrbinary(f"RETR {filename}", out.write, blocksize=settings.ftp_blocksize)
+                break
+            except error_perm as exc:
+                if "550" in str(exc) and attempt < 5:
+                    time.sleep(0.5 + attempt * 0.5)
+                    continue
+                raise
             except Exception:
-                self._remove_file_via_api(filename)
-            return buffer.getvalue()
+                # Don't keep a broken control connection around for the next transfer.
+                self._close_ftp()
+                raise
+        try:
+            ftp.delete(filename)
+            self._file_ids.pop(filename, None)
+        except Exception:
+            self._remove_file_via_api(filename)
 
-    def restore_backup(self, backup_name: str, content: bytes) -> None:
-        if is_mock_mode():
+    def restore_backup(self, backup_name: str, content: bytes | BinaryIO) -> None:
+        if self._settings().mock_mode:
             return
-        with FTP() as ftp:
-            ftp.connect(self.host, self.ftp_port, timeout=10)
-            ftp.login(self.username, self.password)
-            ftp.storbinary(f"STOR {backup_name}", io.BytesIO(content))
+        # Accept an open file so large backups are streamed from disk instead of read whole.
+        source = io.BytesIO(content) if isinstance(content, (bytes, bytearray)) else content
+        ftp = self._get_ftp()
+        try:
+            ftp.storbinary(f"STOR {backup_name}", source, blocksize=settings.ftp_blocksize)
+        except Exception:
+            self._close_ftp()
+            raise
         api = self._get_api()
         base_name = backup_name[:-7] if backup_name.endswith(".backup") else backup_name
         list(api("/system/backup/load", name=base_name))
@@ -364,8 +518,24 @@ def normalize_export(text: str | bytes | bytearray | None) -> str:
     They can also include embedded NUL/control characters and wrapped lines using `\\`.
     These differences are not meaningful configuration changes; normalize them away.
     """
+    return "\n".join(_iter_normalized_lines(text))
+
+
+def hash_export(text: str | bytes | bytearray | None) -> str:
+    """Return `sha256_text(normalize_export(text))` without building the joined text."""
+    digest = hashlib.sha256()
+    first = True
+    for line in _iter_normalized_lines(text):
+        if not first:
+            digest.update(b"\n")
+        digest.update(line.encode("utf-8"))
+        first = False
+    return digest.hexdigest()
+
+
+def _iter_normalized_lines(text: str | bytes | bytearray | None) -> Iterator[str]:
     if isinstance(text, (bytes, bytearray)):
-        text = bytes(text).decode("utf-8", errors="replace")
+        text = text.decode("utf-8", errors="replace")
     raw = (text or "").replace("\x00", "")
     raw = raw.replace("\r\n", "\n").replace("\r", "\n")
 
@@ -397,7 +567,6 @@ def normalize_export(text: str | bytes | bytearray | None) -> str:
         joined.append(buf)
 
     # Second pass: canonicalize section header format into terse-style lines.
-    out: list[str] = []
     current_prefix: str | None = None
     cmd_tokens = {"add", "set", "remove", "enable", "disable", "print", "export", "import"}
 
@@ -417,15 +586,13 @@ def normalize_export(text: str | bytes | bytearray | None) -> str:
                 current_prefix = line
                 continue
             current_prefix = " ".join(tokens[:cmd_idx])
-            out.append(line)
+            yield line
             continue
 
         if current_prefix:
-            out.append(f"{current_prefix} {line}")
+            yield f"{current_prefix} {line}"
         else:
-            out.append(line)
-
-    return "\n".join(out)
+            yield line
 
 
 def sha256_text(text: str) -> str:
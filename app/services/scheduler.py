@@ -4,11 +4,19 @@ from app.services.config import settings
 from app.services.backup import run_scheduled_checks
 
 
-scheduler = BackgroundScheduler()
+# APScheduler's default 1s misfire grace drops a pass whenever the worker thread starts
+# late (e.g. a busy host); allow a late start instead of skipping the interval.
+scheduler = BackgroundScheduler(job_defaults={"misfire_grace_time": 30})
 
 
 def start_scheduler() -> None:
     if scheduler.running:
         return
-    scheduler.add_job(run_scheduled_checks, "interval", seconds=settings.scheduler_interval_seconds)
+    scheduler.add_job(
+        run_scheduled_checks,
+        "interval",
+        seconds=settings.scheduler_interval_seconds,
+        id="run_scheduled_checks",
+        replace_existing=True,
+    )
     scheduler.start()
@@ -1,24 +1,74 @@
+import atexit
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+
 try:
     import httpx
 except ImportError:  # pragma: no cover
     httpx = None
 
+try:
+    import h2  # noqa: F401  (enables httpx's HTTP/2 transport)
+except ImportError:  # pragma: no cover
+    h2 = None
+
 from app.db import get_db
 from app.services.app_settings import is_mock_mode
 from app.services.config import settings
 
 
-def get_telegram_token() -> str:
-    with get_db(settings.db_path) as conn:
-        row = conn.execute("SELECT telegram_token FROM settings WHERE id = 1").fetchone()
-    return row["telegram_token"] if row and row["telegram_token"] else settings.telegram_token
+_client = None
+_client_lock = threading.Lock()
 
 
-def get_default_recipients() -> list[str]:
+def _get_client():
+    # One pooled client for the process keeps the TLS connection to api.telegram.org
+    # alive between notifications instead of handshaking on every send.
+    global _client
+    client = _client
+    if client is not None:
+        return client
+    with _client_lock:
+        if _client is None:
+            _client = httpx.Client(
+                timeout=10,
+                # With h2 available, concurrent sends multiplex over one TLS connection.
+                http2=h2 is not None,
+                limits=httpx.Limits(max_keepalive_connections=20, max_connections=100),
+            )
+            atexit.register(_client.close)
+        return _client
+
+
+@lru_cache(maxsize=1)
+def _load_telegram_settings() -> tuple[str, tuple[str, ...]]:
+    # Token and recipients are read together on every notification; one cached query
+    # serves both until the settings row is written again.
     with get_db(settings.db_path) as conn:
-        row = conn.execute("SELECT telegram_recipients FROM settings WHERE id = 1").fetchone()
+        row = conn.execute("SELECT telegram_token, telegram_recipients FROM settings WHERE id = 1").fetchone()
+    token = row["telegram_token"] if row and row["telegram_token"] else ""
     raw = row["telegram_recipients"] if row and row["telegram_recipients"] else ""
-    return [value.strip() for value in raw.split(",") if value.strip()]
+    return token, tuple(value.strip() for value in raw.split(",") if value.strip())
+
+
+def invalidate_telegram_settings() -> None:
+    _load_telegram_settings.cache_clear()
+
+
+def get_telegram_token() -> str:
+    return _load_telegram_settings()[0] or settings.telegram_token
+
+
+def get_default_recipients() -> list[str]:
+    return list(_load_telegram_settings()[1])
+
+
+def _post_message(client, url: str, chat_id: str, message: str) -> None:
+    res = client.post(url, json={"chat_id": chat_id, "text": message})
+    if not res.is_success:
+        detail = (res.text or "").strip()
+        raise RuntimeError(f"Telegram send failed for chat_id={chat_id}: HTTP {res.status_code} {detail}")
 
 
 def send_message(chat_ids: list[str], message: str) -> None:
@@ -30,11 +80,14 @@ def send_message(chat_ids: list[str], message: str) -> None:
     if not token:
         raise RuntimeError("Missing Telegram token")
     url = f"https://api.telegram.org/bot{token}/sendMessage"
-    with httpx.Client(timeout=10) as client:
-        for chat_id in chat_ids:
-            if not chat_id:
-                continue
-            res = client.post(url, json={"chat_id": chat_id, "text": message})
-            if not res.is_success:
-                detail = (res.text or "").strip()
-                raise RuntimeError(f"Telegram send failed for chat_id={chat_id}: HTTP {res.status_code} {detail}")
+    client = _get_client()
+    targets = [chat_id for chat_id in chat_ids if chat_id]
+    if len(targets) <= 1:
+        for chat_id in targets:
+            _post_message(client, url, chat_id, message)
+        return
+    # Sends are independent round-trips; overlap them on the pooled client.
+    with ThreadPoolExecutor(max_workers=min(len(targets), 8)) as executor:
+        futures = [executor.submit(_post_message, client, url, chat_id, message) for chat_id in targets]
+    for future in futures:
+        future.result()
@@ -15,6 +15,12 @@ class TestDetectChange(unittest.TestCase):
         self.assertTrue(changed)
         self.assertEqual(summary, "Hash changed")
 
+    def test_hash_change_wins_over_logs(self) -> None:
+        logs = [{"logged_at": "2026-01-01 00:00:00", "topics": "script,info", "message": "rule added by admin"}]
+        changed, summary = detect_change(logs=logs, new_hash="new", old_hash="old")
+        self.assertTrue(changed)
+        self.assertEqual(summary, "Hash changed")
+
     def test_logs_without_hash_change_do_not_trigger_backup(self) -> None:
         logs = [{"logged_at": "2026-01-01 00:00:00", "topics": "system,info", "message": "config changed by api"}]
         changed, summary = detect_change(logs=logs, new_hash="same", old_hash="same")
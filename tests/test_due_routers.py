@@ -0,0 +1,93 @@
+import tempfile
+import unittest
+from datetime import datetime
+from pathlib import Path
+from unittest import mock
+from zoneinfo import ZoneInfo
+
+
+from app.db import get_db, init_db
+from app.services import backup
+from app.services.backup import select_due_routers
+from app.services.config import settings
+
+
+NOW_UTC = datetime(2026, 3, 10, 1, 30, 0)
+NOW_PH = NOW_UTC.replace(tzinfo=ZoneInfo("UTC")).astimezone(ZoneInfo("Asia/Manila"))
+
+ROUTERS = [
+    # name, interval_hours, baseline_time, last_check_at, last_baseline_at, enabled
+    ("never-checked", 6, "02:00", None, None, 1),
+    ("recently-checked", 6, "23:00", "2026-03-10T00:00:00", "2026-03-09T15:00:00", 1),
+    ("interval-elapsed", 6, "23:00", "2026-03-09T19:30:00", "2026-03-09T15:00:00", 1),
+    ("zero-interval-defaults-to-6h", 0, "23:00", "2026-03-09T19:00:00", None, 1),
+    ("baseline-due", 6, "09:00", "2026-03-10T01:00:00", "2026-03-09T01:00:00.123456", 1),
+    ("baseline-done-today", 6, "09:00", "2026-03-10T01:00:00", "2026-03-10T01:05:00", 1),
+    ("baseline-later-today", 6, "10:00", "2026-03-10T01:00:00", None, 1),
+    ("baseline-unpadded", 6, "9:15", "2026-03-10T01:00:00", None, 1),
+    ("baseline-invalid", 6, "24:00", "2026-03-10T01:00:00", None, 1),
+    ("baseline-blank", 6, "", "2026-03-10T01:00:00", None, 1),
+    ("garbage-last-check", 6, "23:00", "not-a-date", None, 1),
+    ("disabled", 6, "02:00", None, None, 0),
+]
+
+
+class TestSelectDueRouters(unittest.TestCase):
+    def setUp(self) -> None:
+        self._tmp = tempfile.TemporaryDirectory()
+        self.db_path = Path(self._tmp.name) / "routervault.db"
+        init_db(self.db_path)
+        with get_db(self.db_path) as conn:
+            for name, hours, baseline, last_check, last_baseline, enabled in ROUTERS:
+                conn.execute(
+                    """
+                    INSERT INTO routers
+                    (name, ip, username, encrypted_password, enabled, backup_check_interval_hours,
+                     daily_baseline_time, last_check_at, last_baseline_at, created_at, updated_at)
+                    VALUES (?, '192.0.2.1', 'admin', 'secret', ?, ?, ?, ?, ?, '', '')
+                    """,
+                    (name, enabled, hours, baseline, last_check, last_baseline),
+                )
+
+    def tearDown(self) -> None:
+        self._tmp.cleanup()
+
+    def test_expected_routers_are_due(self) -> None:
+        with get_db(self.db_path) as conn:
+            due = dict((router["name"], baseline_due) for router, baseline_due in select_due_routers(conn, NOW_UTC, NOW_PH))
+        self.assertEqual(
+            due,
+            {
+                "never-checked": True,
+                "interval-elapsed": False,
+                "zero-interval-defaults-to-6h": False,
+                "baseline-due": True,
+                "baseline-unpadded": True,
+                "garbage-last-check": False,
+            },
+        )
+
+    def test_computed_columns_are_not_leaked(self) -> None:
+        with get_db(self.db_path) as conn:
+            router, _ = select_due_routers(conn, NOW_UTC, NOW_PH)[0]
+        self.assertNotIn("baseline_due", router)
+        self.assertNotIn("interval_due", router)
+
+    def test_worker_failures_are_logged(self) -> None:
+        def fail(router_dict, baseline_due):
+            if router_dict["name"] == "never-checked":
+                raise RuntimeError("database is locked")
+
+        with mock.patch.object(settings, "db_path", self.db_path), mock.patch.object(
+            backup, "_run_scheduled_check", side_effect=fail
+        ) as run_check:
+            with self.assertLogs(backup.logger, level="ERROR") as logs:
+                backup.run_scheduled_checks()
+        self.assertGreater(run_check.call_count, 1)
+        self.assertEqual(len(logs.records), 1)
+        self.assertIn("never-checked", logs.output[0])
+        self.assertIn("database is locked", logs.output[0])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,36 @@
+import unittest
+
+
+from app.services.mikrotik import hash_export, normalize_export, sha256_text
+
+
+EXPORT = """# 2026-01-01 00:00:00 by RouterOS 7.14
+# software id = ABCD-1234
+/interface bridge
+add name=bridge1
+/ip address
+add address=192.168.88.1/24 \\
+    interface=bridge1
+/ip firewall nat add action=masquerade chain=srcnat
+"""
+
+
+class TestHashExport(unittest.TestCase):
+    def test_matches_hash_of_normalized_text(self) -> None:
+        self.assertEqual(hash_export(EXPORT), sha256_text(normalize_export(EXPORT)))
+
+    def test_accepts_bytes(self) -> None:
+        self.assertEqual(hash_export(EXPORT.encode("utf-8")), hash_export(EXPORT))
+        self.assertEqual(hash_export(bytearray(EXPORT.encode("utf-8"))), hash_export(EXPORT))
+
+    def test_terse_and_sectioned_exports_hash_equal(self) -> None:
+        terse = "/interface bridge add name=bridge1\r\n/ip address add address=192.168.88.1/24 interface=bridge1\r\n"
+        sectioned = "/interface bridge\nadd name=bridge1\n/ip address\nadd address=192.168.88.1/24 interface=bridge1\n"
+        self.assertEqual(hash_export(terse), hash_export(sectioned))
+
+    def test_empty_export(self) -> None:
+        self.assertEqual(hash_export(""), sha256_text(""))
+
+
+if __name__ == "__main__":
+    unittest.main()
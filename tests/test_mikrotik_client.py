@@ -0,0 +1,204 @@
+import io
+import unittest
+from datetime import datetime
+from unittest import mock
+
+
+from app.services import mikrotik
+from app.services.app_settings import AppSettings
+from app.services.mikrotik import MikroTikClient
+
+
+class FakeApi:
+    def __init__(self, logs: list[dict] | None = None) -> None:
+        self.commands: list[str] = []
+        self.closed = False
+        self.logs = logs or []
+
+    def __call__(self, cmd: str, **kwargs):
+        self.commands.append(cmd)
+        if cmd == "/log/print":
+            return iter(self.logs)
+        if cmd == "/system/clock/print":
+            return iter([{"date": "jan/22/2026", "time": "19:08:09"}])
+        if cmd == "/export":
+            return iter(["/interface bridge add name=bridge1"])
+        return iter([])
+
+    def close(self) -> None:
+        self.closed = True
+
+
+class FakeFtp:
+    instances: list["FakeFtp"] = []
+
+    def __init__(self) -> None:
+        self.logins = 0
+        self.stale = False
+        self.deleted: list[str] = []
+        self.stored: dict[str, bytes] = {}
+        self.closed = False
+        FakeFtp.instances.append(self)
+
+    def connect(self, host, port, timeout=None) -> None:
+        pass
+
+    def login(self, user, passwd) -> None:
+        if passwd == "wrong":
+            raise EOFError("530 Login incorrect")
+        self.logins += 1
+
+    def voidcmd(self, cmd: str) -> str:
+        if self.stale:
+            raise EOFError("connection closed")
+        return "200 OK"
+
+    def retrbinary(self, cmd: str, callback, blocksize: int = 8192) -> None:
+        callback(cmd.encode("utf-8"))
+
+    def storbinary(self, cmd: str, fp, blocksize: int = 8192) -> None:
+        chunks = []
+        while chunk := fp.read(blocksize):
+            chunks.append(chunk)
+        self.stored[cmd.split(" ", 1)[1]] = b"".join(chunks)
+
+    def delete(self, filename: str) -> None:
+        self.deleted.append(filename)
+
+    def quit(self) -> None:
+        pass
+
+    def close(self) -> None:
+        self.closed = True
+
+
+def make_client() -> MikroTikClient:
+    client = MikroTikClient(host="192.0.2.1", port=8728, username="admin", password="secret")
+    client._app_settings = AppSettings(mock_mode=False, export_show_sensitive=False)
+    return client
+
+
+class TestMikroTikClientSession(unittest.TestCase):
+    def test_api_session_is_reused_until_close(self) -> None:
+        apis: list[FakeApi] = []
+
+        def fake_connect(**kwargs):
+            apis.append(FakeApi())
+            return apis[-1]
+
+        with mock.patch.object(mikrotik, "connect", side_effect=fake_connect):
+            with make_client() as client:
+                client.fetch_logs(None)
+                client.get_router_clock_iso()
+                client.export_config()
+            self.assertEqual(len(apis), 1)
+            self.assertTrue(apis[0].closed)
+            self.assertEqual(apis[0].commands[:2], ["/system/clock/print", "/log/print"])
+            self.assertEqual(apis[0].commands.count("/system/clock/print"), 1)
+
+    def test_ftp_session_is_reused_and_replaced_when_stale(self) -> None:
+        FakeFtp.instances = []
+        with mock.patch.object(mikrotik, "FTP", FakeFtp):
+            client = make_client()
+            self.assertEqual(client._download_file("a.rsc"), b"RETR a.rsc")
+            self.assertEqual(client._download_file("b.backup"), b"RETR b.backup")
+            self.assertEqual(len(FakeFtp.instances), 1)
+            self.assertEqual(FakeFtp.instances[0].deleted, ["a.rsc", "b.backup"])
+
+            FakeFtp.instances[0].stale = True
+            client._download_file("c.rsc")
+            self.assertEqual(len(FakeFtp.instances), 2)
+            client.close()
+            self.assertIsNone(client._ftp)
+
+    def test_failed_ftp_login_closes_socket(self) -> None:
+        FakeFtp.instances = []
+        with mock.patch.object(mikrotik, "FTP", FakeFtp):
+            client = make_client()
+            client.password = "wrong"
+            with self.assertRaises(EOFError):
+                client._get_ftp()
+        self.assertTrue(FakeFtp.instances[0].closed)
+        self.assertIsNone(client._ftp)
+
+    def test_restore_streams_file_objects_and_bytes(self) -> None:
+        FakeFtp.instances = []
+        api = FakeApi()
+        with mock.patch.object(mikrotik, "FTP", FakeFtp), mock.patch.object(mikrotik, "connect", return_value=api):
+            with make_client() as client:
+                client.restore_backup("a.backup", io.BytesIO(b"streamed"))
+                client.restore_backup("b.backup", b"in-memory")
+        self.assertEqual(FakeFtp.instances[0].stored, {"a.backup": b"streamed", "b.backup": b"in-memory"})
+        self.assertEqual(api.commands, ["/system/backup/load", "/system/backup/load"])
+
+
+class TestFetchLogs(unittest.TestCase):
+    LOGS = [
+        {"time": "19:00:00", "topics": "system,info,account", "message": "user admin logged in from 10.0.0.2 via winbox"},
+        {"time": "19:01:00", "topics": "system,info", "message": "filter rule added by admin"},
+        {"time": "19:02:00", "topics": "script,info", "message": "nightly cleanup done"},
+        {"time": "19:03:00", "topics": "interface,info", "message": "ether1 Link Down"},
+        {"time": "19:04:00", "topics": "dhcp,info", "message": "dhcp1 assigned 10.0.0.9"},
+        {"time": "18:00:00", "topics": "system,info", "message": "address changed by admin"},
+    ]
+
+    def fetch(self, **kwargs) -> list[dict]:
+        client = make_client()
+        with mock.patch.object(mikrotik, "connect", return_value=FakeApi(self.LOGS)):
+            return client.fetch_logs("2026-01-22 18:30:00", **kwargs)
+
+    def test_config_changes_only(self) -> None:
+        logs = self.fetch(only_config_changes=True)
+        self.assertEqual(
+            [entry["message"] for entry in logs],
+            ["filter rule added by admin", "nightly cleanup done"],
+        )
+        self.assertEqual(logs[0]["logged_at"], "2026-01-22 19:01:00")
+
+    def test_all_logs_still_drop_noise(self) -> None:
+        logs = self.fetch(only_config_changes=False)
+        self.assertEqual(
+            [entry["message"] for entry in logs],
+            ["filter rule added by admin", "nightly cleanup done", "dhcp1 assigned 10.0.0.9"],
+        )
+
+
+class TestLogDatetimeParsing(unittest.TestCase):
+    def setUp(self) -> None:
+        self.client = make_client()
+        self.router_now = datetime(2026, 1, 22, 20, 0, 0)
+
+    def parse(self, date_raw: str, time_raw: str) -> datetime | None:
+        return self.client._parse_log_datetime({"date": date_raw, "time": time_raw}, self.router_now)
+
+    def test_classic_routeros_date(self) -> None:
+        self.assertEqual(self.parse("jan/22/2026", "19:08:09"), datetime(2026, 1, 22, 19, 8, 9))
+        self.assertEqual(self.parse("Dec/01/2025", "00:00:00"), datetime(2025, 12, 1, 0, 0, 0))
+
+    def test_other_date_formats(self) -> None:
+        self.assertEqual(self.parse("2026-01-22", "19:08:09"), datetime(2026, 1, 22, 19, 8, 9))
+        self.assertEqual(self.parse("2026/01/22", "19:08:09"), datetime(2026, 1, 22, 19, 8, 9))
+        self.assertEqual(self.parse("jan/22/26", "19:08:09"), datetime(2026, 1, 22, 19, 8, 9))
+        self.assertEqual(self.parse("jan/2/2026", "9:08:09"), datetime(2026, 1, 2, 9, 8, 9))
+
+    def test_date_inside_time(self) -> None:
+        self.assertEqual(self.parse("", "jan/21 23:59:58"), datetime(2026, 1, 21, 23, 59, 58))
+        self.assertEqual(self.parse("", "dec/31/2025 23:59:58"), datetime(2025, 12, 31, 23, 59, 58))
+        self.assertEqual(self.parse("", "2026-01-21 23:59:58"), datetime(2026, 1, 21, 23, 59, 58))
+
+    def test_time_only_uses_router_today(self) -> None:
+        self.assertEqual(self.parse("", "19:08:09"), datetime(2026, 1, 22, 19, 8, 9))
+        self.assertEqual(self.parse("", "9:08:09"), datetime(2026, 1, 22, 9, 8, 9))
+
+    def test_unparseable(self) -> None:
+        self.assertIsNone(self.client._parse_log_datetime({"date": "feb/30/2026", "time": "19:08:09"}, None))
+        self.assertIsNone(self.parse("", "soon"))
+        self.assertIsNone(self.client._parse_log_datetime({"date": "22.01.2026", "time": "19:08:09"}, None))
+
+    def test_router_clock(self) -> None:
+        with mock.patch.object(mikrotik, "connect", return_value=FakeApi()):
+            self.assertEqual(self.client._get_router_clock(), datetime(2026, 1, 22, 19, 8, 9))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,144 @@
+import json
+import tempfile
+import unittest
+from datetime import datetime, timezone
+from pathlib import Path
+from unittest import mock
+
+
+from app.db import get_db, init_db
+from app.services import backup
+from app.services.config import settings
+from app.services.mikrotik import MikroTikClient
+
+
+EXPORT = b"/interface bridge add name=bridge1\n"
+
+
+def fixed_datetime(now: datetime) -> type:
+    class FixedDatetime(datetime):
+        @classmethod
+        def utcnow(cls):
+            return now
+
+        @classmethod
+        def now(cls, tz=None):
+            return now.replace(tzinfo=timezone.utc).astimezone(tz) if tz else now
+
+    return FixedDatetime
+
+
+class RouterCheckTestCase(unittest.TestCase):
+    def setUp(self) -> None:
+        self._tmp = tempfile.TemporaryDirectory()
+        root = Path(self._tmp.name)
+        self.db_path = root / "routervault.db"
+        init_db(self.db_path)
+        with get_db(self.db_path) as conn:
+            conn.execute("UPDATE settings SET mock_mode = 1 WHERE id = 1")
+        patches = [
+            mock.patch.object(settings, "db_path", self.db_path),
+            mock.patch.object(settings, "storage_path", root / "storage"),
+            mock.patch.object(MikroTikClient, "create_rsc_file", return_value=EXPORT),
+        ]
+        for patch in patches:
+            patch.start()
+            self.addCleanup(patch.stop)
+
+    def tearDown(self) -> None:
+        self._tmp.cleanup()
+
+    def add_router(self, name: str) -> int:
+        with get_db(self.db_path) as conn:
+            cursor = conn.execute(
+                """
+                INSERT INTO routers
+                (name, ip, username, encrypted_password, enabled, backup_check_interval_hours,
+                 daily_baseline_time, created_at, updated_at)
+                VALUES (?, '192.0.2.1', 'admin', 'secret', 1, 6, '', '', '')
+                """,
+                (name,),
+            )
+            return int(cursor.lastrowid)
+
+    def router(self, router_id: int) -> dict:
+        with get_db(self.db_path) as conn:
+            return dict(conn.execute("SELECT * FROM routers WHERE id = ?", (router_id,)).fetchone())
+
+
+class TestRunRouterCheck(RouterCheckTestCase):
+    LOGS = [{"logged_at": "2026-03-10 01:29:00", "topics": "system,info", "message": "address changed by admin"}]
+    UNTOUCHED = ("last_backup_at", "last_success_at", "last_config_change_at", "last_backup_links", "last_backup_log_at")
+
+    def check(self, router_id: int, now: datetime, clock: str) -> None:
+        with mock.patch.object(backup, "datetime", fixed_datetime(now)), mock.patch.object(
+            MikroTikClient, "fetch_logs", return_value=self.LOGS
+        ), mock.patch.object(MikroTikClient, "get_router_clock_iso", return_value=clock):
+            backup.run_router_check(self.router(router_id), baseline_due=False)
+
+    def router_logs(self, router_id: int) -> list[dict]:
+        with get_db(self.db_path) as conn:
+            rows = conn.execute("SELECT * FROM router_logs WHERE router_id = ? ORDER BY id", (router_id,))
+            return [dict(row) for row in rows]
+
+    def test_first_check_backs_up_and_unchanged_check_only_moves_check_columns(self) -> None:
+        router_id = self.add_router("core")
+        first_now = datetime(2026, 3, 10, 1, 30, 0)
+        self.check(router_id, first_now, "2026-03-10T09:30:00")
+
+        with get_db(self.db_path) as conn:
+            backups = [dict(row) for row in conn.execute("SELECT * FROM backups WHERE router_id = ?", (router_id,))]
+        self.assertEqual(len(backups), 1)
+        first = self.router(router_id)
+        self.assertEqual(first["last_backup_at"], first_now.isoformat())
+        self.assertEqual(first["last_success_at"], first_now.isoformat())
+        self.assertEqual(first["last_config_change_at"], first_now.isoformat())
+        self.assertEqual(
+            json.loads(first["last_backup_links"]),
+            {"backup": backups[0]["backup_link"], "rsc": backups[0]["rsc_link"]},
+        )
+        self.assertEqual(first["last_backup_log_at"], "2026-03-10 01:29:01")
+        self.assertEqual(first["last_log_check_at"], "2026-03-10 09:29:59")
+        self.assertIsNone(first["last_baseline_at"])
+        first_logs = self.router_logs(router_id)
+        self.assertEqual([row["created_at"] for row in first_logs], [first_now.isoformat()])
+        self.assertEqual(first_logs[0]["backup_id"], backups[0]["id"])
+
+        second_now = datetime(2026, 3, 10, 7, 30, 0)
+        self.check(router_id, second_now, "2026-03-10T15:30:00")
+
+        second = self.router(router_id)
+        for column in self.UNTOUCHED:
+            self.assertEqual(second[column], first[column], column)
+        self.assertEqual(second["last_hash"], first["last_hash"])
+        self.assertEqual(second["last_check_at"], second_now.isoformat())
+        self.assertEqual(second["updated_at"], second_now.isoformat())
+        self.assertEqual(second["last_log_check_at"], "2026-03-10 15:29:59")
+        with get_db(self.db_path) as conn:
+            self.assertEqual(conn.execute("SELECT COUNT(*) FROM backups").fetchone()[0], 1)
+        second_logs = self.router_logs(router_id)[len(first_logs):]
+        self.assertEqual([row["created_at"] for row in second_logs], [second_now.isoformat()])
+        self.assertIsNone(second_logs[0]["backup_id"])
+
+
+class TestScheduledPass(RouterCheckTestCase):
+    def test_routers_sharing_a_slug_get_their_own_files(self) -> None:
+        first = self.add_router("Branch A")
+        second = self.add_router("Branch_A")
+        with mock.patch.object(backup, "datetime", fixed_datetime(datetime(2026, 3, 10, 1, 30, 0))):
+            backup.run_scheduled_checks()
+
+        with get_db(self.db_path) as conn:
+            rows = conn.execute("SELECT router_id, backup_link, rsc_link FROM backups ORDER BY router_id").fetchall()
+        self.assertEqual([row["router_id"] for row in rows], [first, second])
+        self.assertNotEqual(rows[0]["backup_link"], rows[1]["backup_link"])
+        self.assertNotEqual(rows[0]["rsc_link"], rows[1]["rsc_link"])
+
+        backups_dir = settings.storage_path / "Branch_A" / "backups"
+        for row in rows:
+            name = Path(row["backup_link"]).name
+            self.assertEqual((backups_dir / name).read_bytes(), f"backup::{name[:-7]}".encode("utf-8"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,53 @@
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+
+from app.db import get_db, init_db
+from app.services import telegram
+from app.services.config import settings
+
+
+class TestTelegramSettings(unittest.TestCase):
+    def setUp(self) -> None:
+        self._tmp = tempfile.TemporaryDirectory()
+        self.db_path = Path(self._tmp.name) / "routervault.db"
+        init_db(self.db_path)
+        self._patch = mock.patch.object(settings, "db_path", self.db_path)
+        self._patch.start()
+        telegram.invalidate_telegram_settings()
+
+    def tearDown(self) -> None:
+        telegram.invalidate_telegram_settings()
+        self._patch.stop()
+        self._tmp.cleanup()
+
+    def _write(self, token: str, recipients: str) -> None:
+        with get_db(self.db_path) as conn:
+            conn.execute(
+                "UPDATE settings SET telegram_token = ?, telegram_recipients = ? WHERE id = 1",
+                (token, recipients),
+            )
+
+    def test_reads_token_and_recipients_from_one_cached_row(self) -> None:
+        self._write("tok-1", " 111, ,222 ")
+        self.assertEqual(telegram.get_telegram_token(), "tok-1")
+        self.assertEqual(telegram.get_default_recipients(), ["111", "222"])
+
+        self._write("tok-2", "333")
+        self.assertEqual(telegram.get_telegram_token(), "tok-1")
+
+        telegram.invalidate_telegram_settings()
+        self.assertEqual(telegram.get_telegram_token(), "tok-2")
+        self.assertEqual(telegram.get_default_recipients(), ["333"])
+
+    def test_blank_token_falls_back_to_environment(self) -> None:
+        self._write("", "")
+        with mock.patch.object(settings, "telegram_token", "env-token"):
+            self.assertEqual(telegram.get_telegram_token(), "env-token")
+        self.assertEqual(telegram.get_default_recipients(), [])
+
+
+if __name__ == "__main__":
+    unittest.main()